@@ -4,28 +4,50 @@ This script allows to download all the Official Journals of EU publicly
  the user.
 
 Usage:
-    >>> python download_and_unzip.py <dataset_root> <language>
+    >>> python download_and_unzip.py <dataset_root> <language> [--verify]
 where:
     <dataset_root> is the directory that will contain the downloaded data
     <language> language of the downloaded journals
+    --verify fully checks already downloaded zip files (slow)
 """
 import argparse
+import os
+import queue
 import re
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from zipfile import ZipFile
 
-import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
+from urllib3.util.retry import Retry
 
 
 class OJDownloader:
     """
     Helper class to make the downloading of OJ XML-F more readable.
     """
-    def __init__(self):
+    # Match the `.ZIP` files in the listing page and get only the years
+    _YEAR_RE = re.compile(r'(?<=JOx_FMX_[A-Z]{2}_)\d{4}(?=\.ZIP)', re.IGNORECASE)
+
+    def __init__(self, verify: bool = False):
+        """
+        Args:
+            verify: If True, already downloaded zip files are fully checked
+                (i.e. CRC of each member) before deciding whether they must
+                be downloaded again. This is almost as slow as extracting them.
+        """
         self.base_url = 'http://data.europa.eu/euodp/repository/ec/publ/op-jo-formex/'
+        self.verify = verify
+
+        # All requests target the same host: reuse connections across them
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                              max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[502, 503, 504]))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def download(self, out_dir: Path, lang: str, year: int):
 
@@ -42,27 +64,74 @@ class OJDownloader:
         parent_zip_path = out_dir / lang / f'{lang_year_stem}.ZIP'
         if not self._is_zip_valid(parent_zip_path):
             url = self.base_url + f'JOx_FMX_{lang}/{lang_year_stem}.ZIP'
-            response = requests.get(url, stream=True)
-            if response.status_code == 200:
-                with parent_zip_path.open('wb') as f:
-                    for chunk in tqdm(response,
-                                      unit='bytes',
-                                      unit_scale=128,
-                                      total=self.get_content_len(url) // 128,
-                                      desc=f'[{lang_year_stem}] Downloading...'):
-                        f.write(chunk)
-
-        # Extract the "parent" zip, i.e. this contains other archives
-        # Notice: this zip file is not deleted even after extraction
-        with ZipFile(parent_zip_path, "r") as zip_ref:
-            zip_ref.extractall(year_dir)
-
-        # Extract each of the sub-archives
-        zip_files = list(year_dir.glob('*.zip'))
-        for zip_path in tqdm(zip_files, desc=f'[{lang_year_stem}] Decompressing...'):
+            desc = f'[{lang_year_stem}] Downloading...'
+
+            # Size marker of a previous download, which is now stale
+            size_file = self._size_file(parent_zip_path)
+            if size_file.is_file():
+                size_file.unlink()
+
+            # Download using multiple connections, if the server allows it
+            content_len, accepts_ranges = self._probe(url)
+            completed = (accepts_ranges and content_len > 0 and
+                         self._download_ranges(url, parent_zip_path, content_len, desc))
+            if not completed:
+                completed = self._download_stream(url, parent_zip_path, desc)
+
+            # Keep track of the size of the finished download, to detect
+            #  files which are later truncated or overwritten
+            if completed:
+                size_file.write_text(str(parent_zip_path.stat().st_size))
+
+        # Extract the "parent" zip, i.e. this contains other archives.
+        #  Each sub-archive is handed over to a pool of threads as soon as it
+        #  is extracted, so that it is decompressed while the parent zip is
+        #  still being extracted. Decompression releases the GIL, thus
+        #  sub-archives are actually extracted in parallel.
+        # Notice: the parent zip file is not deleted even after extraction
+        num_workers = min(8, os.cpu_count() or 1)
+        zip_queue = queue.Queue(maxsize=4)
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            for _ in range(num_workers):
+                executor.submit(self._extract_from_queue, zip_queue, year_dir)
+
+            try:
+                with ZipFile(parent_zip_path, 'r') as zip_ref:
+                    for member in tqdm(zip_ref.infolist(), desc=f'[{lang_year_stem}] Decompressing...'):
+                        zip_ref.extract(member, year_dir)
+                        if '/' not in member.filename and member.filename.endswith('.zip'):
+                            zip_queue.put(year_dir / member.filename)
+            finally:
+                # Signal each worker that there are no more sub-archives
+                for _ in range(num_workers):
+                    zip_queue.put(None)
+
+    def _extract_from_queue(self, zip_queue: queue.Queue, out_dir: Path):
+        """
+        Extract the zip files in `zip_queue` until None is received.
+        """
+        zip_path = zip_queue.get()
+        while zip_path is not None:
+            self._extract_one(zip_path, out_dir)
+            zip_path = zip_queue.get()
+
+    @staticmethod
+    def _extract_one(zip_path: Path, out_dir: Path):
+        """
+        Extract a zip file to `out_dir`, then delete it.
+
+        Returns True if the extraction succeeded.
+        """
+        try:
             with ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(year_dir)
+                zip_ref.extractall(out_dir)
             zip_path.unlink()
+        except Exception as e:
+            # Any failure is caught here, as a worker thread that dies
+            #  would stop consuming the queue, which may then block forever
+            print(f'Failed to extract {zip_path}: {e}')
+            return False
+        return True
 
     def list_available_years(self, lang: str, verbose: bool = True):
         """
@@ -71,22 +140,21 @@ class OJDownloader:
         """
         url = self.base_url + f'JOx_FMX_{lang.upper()}'
 
-        page = requests.get(url).text
+        page = self.session.get(url).text
 
-        # Match the `.ZIP` files in the page and get only the years
-        pattern = re.compile(r'(?<=JOx_FMX_[A-Z]{2}_)\d{4}(?=.ZIP)')
-        matches = pattern.findall(page)
-
-        available_years = np.unique([int(m) for m in matches])
+        available_years = sorted({int(m) for m in self._YEAR_RE.findall(page)})
         if verbose:
             print(f'The following years are available for language ',
                   lang.upper(), ':', *available_years)
 
         return available_years
 
-    @staticmethod
-    def get_content_len(url: str):
-        response = requests.head(url)
+    def _probe(self, url: str):
+        """
+        Get the content length of `url` (-1 if unknown) and whether the
+         server accepts range requests for it.
+        """
+        response = self.session.head(url)
 
         if not response.ok:
             raise IOError(f'Impossible to reach: {url}')
@@ -97,38 +165,142 @@ class OJDownloader:
         except KeyError:
             content_len = -1
 
-        return content_len
+        accepts_ranges = response.headers.get('accept-ranges', '').lower() == 'bytes'
 
-    @staticmethod
-    def _is_zip_valid(f: Path):
+        return content_len, accepts_ranges
+
+    def _download_stream(self, url: str, out_file: Path, desc: str):
+        """
+        Download `url` to `out_file` with a single streaming request.
+
+        Returns True if the whole content has been downloaded.
+        """
+        with self.session.get(url, stream=True) as response:
+            if response.status_code != 200:
+                return False
+            total = int(response.headers.get('content-length', 0))
+            with out_file.open('wb') as f, tqdm(total=total, unit='B', unit_scale=True, desc=desc) as progress:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    f.write(chunk)
+                    progress.update(len(chunk))
+            return total <= 0 or progress.n == total
+
+    def _download_ranges(self, url: str, out_file: Path, content_len: int, desc: str,
+                         num_parts: int = 4):
+        """
+        Download `url` to `out_file` splitting it into `num_parts` ranges,
+         which are downloaded concurrently over different connections.
+
+        Ranges are written to a temporary `.part` file, which is moved to
+         `out_file` only if all of them have been downloaded. Otherwise,
+         a failed range would leave a hole of zeros in a full-size file.
+
+        Returns False if the download could not be completed this way.
+        """
+        if not hasattr(os, 'pwrite'):  # e.g. on Windows
+            return False
+
+        bounds = [content_len * i // num_parts for i in range(num_parts + 1)]
+
+        part_file = out_file.with_name(f'{out_file.name}.part')
+        try:
+            fd = os.open(part_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            try:
+                with tqdm(total=content_len, unit='B', unit_scale=True, desc=desc) as progress, \
+                        ThreadPoolExecutor(max_workers=num_parts) as executor:
+                    completed = list(executor.map(self._download_range, [url] * num_parts, [fd] * num_parts,
+                                                  bounds[:-1], bounds[1:], [progress] * num_parts))
+            finally:
+                os.close(fd)
+
+            if all(completed):
+                os.replace(part_file, out_file)
+                return True
+        finally:
+            if part_file.exists():
+                part_file.unlink()
+
+        return False
+
+    def _download_range(self, url: str, fd: int, start: int, end: int, progress: tqdm):
+        """
+        Download bytes [start, end) of `url`, writing them at the same
+         offset of the file open as `fd`.
+
+        Returns True if the whole range has been downloaded.
+        """
+        headers = {'Range': f'bytes={start}-{end - 1}'}
+        try:
+            with self.session.get(url, headers=headers, stream=True) as response:
+                if response.status_code != 206:
+                    return False
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    os.pwrite(fd, chunk, start)
+                    start += len(chunk)
+                    progress.update(len(chunk))
+        except requests.RequestException:
+            # e.g. the connection is broken before the range ends: the
+            #  caller then falls back to a single streaming download
+            return False
+
+        return start == end
+
+    def _is_zip_valid(self, f: Path):
         """
         Check whether the file is a valid zip file.
+
+        Unless `self.verify` is set, this only checks the file size against
+         the one recorded when the download finished and the presence of
+         the zip end of central directory record, which is nearly instant.
         """
-        is_valid = f.is_file()
+        if not f.is_file():
+            return False
 
-        if is_valid:
+        size_file = self._size_file(f)
+        if size_file.is_file():
             try:
-                ZipFile(f).testzip()
-            except zipfile.BadZipFile:
-                is_valid = False
+                if int(size_file.read_text()) != f.stat().st_size:
+                    return False
+            except (ValueError, OSError):
+                return False
+
+        if not self.verify:
+            return zipfile.is_zipfile(f)
 
-        return is_valid
+        try:
+            with ZipFile(f) as zip_ref:
+                return zip_ref.testzip() is None
+        except (zipfile.BadZipFile, OSError):
+            return False
+
+    @staticmethod
+    def _size_file(f: Path):
+        """
+        File where the expected size of downloaded file `f` is stored.
+        """
+        return f.with_name(f'{f.name}.size')
 
 
 def main(args: argparse.Namespace):
 
-    downloader = OJDownloader()
+    downloader = OJDownloader(verify=args.verify)
 
     years = downloader.list_available_years(lang=args.language)
 
-    for year in years:
-        downloader.download(args.dataset_root, lang=args.language, year=year)
+    # Years are processed two at a time, so that the next year is
+    #  downloaded while the previous one is still being extracted
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(downloader.download, args.dataset_root, lang=args.language, year=year)
+                   for year in years]
+        for future in futures:
+            future.result()
 
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('dataset_root', type=Path)
     parser.add_argument('language', type=str)
+    parser.add_argument('--verify', action='store_true')
 
     args = parser.parse_args()
 
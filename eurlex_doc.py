@@ -1,7 +1,8 @@
 import xml.etree.ElementTree as ET
 from datetime import datetime
 from pathlib import Path
-from xml.etree.cElementTree import iterparse
+
+from lxml import etree
 
 from parsing.legbase_parser import LegBaseParser
 from parsing.location_parser import LocationParser
@@ -39,6 +40,9 @@ class EurLexDataFile(EurLexFile):
         Args:
             file_path: File path.
             tokenizer: Tokenizer instance used for text tokenization.
+            legbase_parser: If provided, legal bases are extracted while
+                parsing the document.
+            loc_parser: LocationParser instance used to find locations.
         """
         try:
             super().__init__(file_path)
@@ -46,13 +50,16 @@ class EurLexDataFile(EurLexFile):
             print(f'{file_path} does not exist.')
             return
 
+        # The document is parsed only once: text, dates and legal bases are
+        #  all taken from the same tree. The whole tree is traversed, which
+        #  is faster with the standard library than with lxml proxies
+        root = ET.parse(self.file_path)
+
         self.legal_bases = []
         if legbase_parser is not None:
-            self.legal_bases.extend(legbase_parser.parse(self.file_path))
-
-        root = ET.parse(self.file_path)
+            self.legal_bases.extend(legbase_parser.parse_tree(root.getroot()))
 
-        # Load all text - notice how past elements are cleared
+        # Load all text
         self.text = '\n'.join(root.getroot().itertext())
 
         # One document can have multiple dates (e.g. L_2011313EN.01004501.xml)
@@ -100,7 +107,8 @@ class EurLexMetaFile(EurLexFile):
 
         # Read metadata of interest from the document
         path = []
-        for event, elem in iterparse(file_path, events=('start', 'end')):
+        for event, elem in etree.iterparse(str(file_path), events=('start', 'end'),
+                                           remove_comments=True, remove_pis=True):
             if event == 'start':
                 path.append(elem.tag)
                 if elem.tag == 'TITLE' and 'PAPER' in path:
@@ -123,6 +131,8 @@ class EurLexMetaFile(EurLexFile):
                     elif path[-2] == 'DOC.SUB.PUB':
                         self.sub_pubs.append(self.file_path.parent / elem.attrib['FILE'])
                 elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
                 path.pop()
 
     def __str__(self):
@@ -1,3 +1,7 @@
+import hashlib
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List
 from typing import Union
@@ -20,6 +24,15 @@ class EurLexItem:
         - One main document
         - (Possibly) additional docs
     """
+    # The following docs have been manually marked as CFSP even though
+    #  they don't satisfy the other requirements
+    _MANUAL_CFSP = frozenset({
+        'L_2009009EN.01005101.doc.xml', 'L_2010201EN.01003001.doc.xml', 'L_2014014EN.01000101.doc.xml',
+        'L_2014205EN.01000201.doc.xml', 'L_2016074EN.01000101.doc.xml', 'L_2016300EN.01000101.doc.xml',
+        'L_2017328EN.01003201.doc.xml'
+    })
+    _CFSP_AUTHORS = frozenset({'PSC', 'EEAS', 'PESC'})
+
     def __init__(self, meta_doc: EurLexMetaFile, main_doc: EurLexDataFile, sub_docs: List[EurLexDataFile]):
         self.meta = meta_doc
         self.main_doc = main_doc
@@ -37,29 +50,17 @@ class EurLexItem:
         """
         Determine whether this item is Common Foreign and Security Policy (CFSP)
         """
-        valid_cfsp = False
-
-        # The following docs have been manually marked as CFSP even though
-        #  they don't satisfy the other requirements
-        manually_selected = {
-            'L_2009009EN.01005101.doc.xml', 'L_2010201EN.01003001.doc.xml', 'L_2014014EN.01000101.doc.xml',
-            'L_2014205EN.01000201.doc.xml', 'L_2016074EN.01000101.doc.xml', 'L_2016300EN.01000101.doc.xml',
-            'L_2017328EN.01003201.doc.xml'
-        }
-        if self.meta.file_path.name in manually_selected:
-            valid_cfsp = True
-
-        if 'cfsp' in self.meta.title.lower():
-            valid_cfsp = True
+        # Cheapest checks first
+        if self.meta.file_path.name in EurLexItem._MANUAL_CFSP:
+            return True
 
         if self.meta.com == 'CFSP':
-            valid_cfsp = True
+            return True
 
-        for author in self.meta.authors:
-            if author in {'PSC', 'EEAS', 'PESC'}:
-                valid_cfsp = True
+        if any(author in EurLexItem._CFSP_AUTHORS for author in self.meta.authors):
+            return True
 
-        return valid_cfsp
+        return 'cfsp' in self.meta.title.lower()
 
     def to_txt(self):
         """
@@ -85,6 +86,91 @@ class EurLexItem:
         return self.main_doc.dates[0]
 
 
+# Parsers and settings used by each worker process, see `_init_worker`
+_worker_state = {}
+
+
+def _init_worker(tokenize: bool, parse_legal_bases: bool, parse_locations: bool, cache_dir: Path):
+    """
+    Instantiate the parsers once per worker process, so that heavyweight
+     setup (e.g. compiling location patterns) is not repeated for each file.
+    """
+    _worker_state['tokenizer'] = Tokenizer(filter_stopwords=True, check_is_alpha=True) if tokenize else None
+    _worker_state['legbase_parser'] = LegBaseParser() if parse_legal_bases else None
+    geo_info_file = Path('./data/geo_info.csv')
+    _worker_state['loc_parser'] = LocationParser(geo_info_file) if parse_locations else None
+    _worker_state['cache_dir'] = cache_dir
+
+    # Locations found also depend on the geographical info in use
+    options = f'{tokenize}:{parse_legal_bases}:{parse_locations}'
+    if parse_locations:
+        options += f':{_stat_key(geo_info_file)}'
+    _worker_state['options'] = options
+
+
+def _stat_key(file_path: Path):
+    """
+    Get the modification time and size of `file_path`, if it exists.
+    """
+    try:
+        stat = file_path.stat()
+    except (AttributeError, OSError):  # `file_path` may also be None
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _process_one(meta_file: Path):
+    """
+    Load the EurLexItem described by `meta_file`, possibly from cache.
+
+    Returns the item, or None if it is not a CFSP decision.
+    """
+    cache_dir = _worker_state['cache_dir']
+    if cache_dir is None:
+        return _load_item(meta_file)
+
+    # Cached results are invalidated whenever the file or the options change
+    key = f'{meta_file}:{_stat_key(meta_file)}:{_worker_state["options"]}'
+    cache_file = cache_dir / f'{hashlib.blake2b(key.encode(), digest_size=16).hexdigest()}.pkl'
+    if cache_file.is_file():
+        with cache_file.open('rb') as f:
+            main_pub_key, item = pickle.load(f)
+
+        # The main document is known only after parsing the metadata, thus
+        #  its modification time and size are stored along with the item
+        if item is None or main_pub_key == _stat_key(item.meta.main_pub):
+            return item
+
+    item = _load_item(meta_file)
+    main_pub_key = _stat_key(item.meta.main_pub) if item is not None else None
+
+    # Write to a temporary file first, so that no partial file is ever read
+    tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+    with tmp_file.open('wb') as f:
+        pickle.dump((main_pub_key, item), f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp_file.replace(cache_file)
+
+    return item
+
+
+def _load_item(meta_file: Path):
+    """
+    Parse the EurLexItem described by `meta_file`.
+
+    Returns the item, or None if it is not a CFSP decision.
+    """
+    meta_doc = EurLexMetaFile(meta_file)
+    if not meta_doc.is_dec():
+        return None
+
+    main_doc = EurLexDataFile(meta_doc.main_pub, _worker_state['tokenizer'],
+                              _worker_state['legbase_parser'], _worker_state['loc_parser'])
+    sub_docs = None  # todo: adding sub_docs causes a huge performance drop due to socket recv(?!)
+
+    item = EurLexItem(meta_doc, main_doc, sub_docs)
+    return item if item.is_cfsp() else None
+
+
 class EurLexDataset:
     """
     Class modelling a dataset of EurLex documents.
@@ -95,7 +181,8 @@ class EurLexDataset:
         items (list of EurLexItem): List of dataset elements.
     """
     def __init__(self, data_root: Path, tokenize: bool = False,
-                 parse_legal_bases: bool = False, parse_locations: bool = False):
+                 parse_legal_bases: bool = False, parse_locations: bool = False,
+                 num_workers: int = 1, cache_dir: Path = None):
         """
         Initialize the EurLexDataset loading all the documents.
 
@@ -111,31 +198,38 @@ class EurLexDataset:
             parse_locations: If True, all data documents are parsed to
                 find mentions of world locations. Note: this may lead to a
                 significant longer time for EurLexDataset init.
+            num_workers: Number of processes used to load the documents.
+                If None, as many processes as CPUs are used. If other than
+                1, on platforms where processes are spawned (e.g. Windows,
+                macOS) the dataset must be created under a
+                `if __name__ == '__main__':` guard.
+            cache_dir: If provided, parsed documents are cached in this
+                directory and loaded from there on following runs.
         """
         self.data_root = data_root
 
         # Documents are created starting from `.doc.xml` files.
         self.file_list = self._list_meta_files(self.data_root)
 
-        self.tokenizer = Tokenizer(filter_stopwords=True, check_is_alpha=True) if tokenize else None
-
-        self.legbase_parser = LegBaseParser() if parse_legal_bases else None
+        if cache_dir is not None:
+            cache_dir.mkdir(exist_ok=True, parents=True)
 
-        self.loc_parser = None
-        if parse_locations:
-            self.loc_parser = LocationParser(Path('./data/geo_info.csv'))
+        worker_args = (tokenize, parse_legal_bases, parse_locations, cache_dir)
 
         self.items = []
-        for f in tqdm(self.file_list):
-            meta_doc = EurLexMetaFile(f)
-            if meta_doc.is_dec():
-                main_doc = EurLexDataFile(meta_doc.main_pub, self.tokenizer,
-                                          self.legbase_parser, self.loc_parser)
-                sub_docs = None  # todo: adding sub_docs causes a huge performance drop due to socket recv(?!)
-
-                item = EurLexItem(meta_doc, main_doc, sub_docs)
-                if item.is_cfsp():
+        if num_workers == 1:
+            _init_worker(*worker_args)
+            for item in tqdm(map(_process_one, self.file_list), total=len(self.file_list)):
+                if item is not None:
                     self.items.append(item)
+        else:
+            # Documents are independent, thus they are loaded in parallel
+            with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker,
+                                     initargs=worker_args) as executor:
+                for item in tqdm(executor.map(_process_one, self.file_list, chunksize=32),
+                                 total=len(self.file_list)):
+                    if item is not None:
+                        self.items.append(item)
 
     def __getitem__(self, idx):
         return self.items[idx]
@@ -152,13 +246,17 @@ class EurLexDataset:
         assert mode in {'headers', 'text'}
 
         if mode == 'headers':
-            text = '\n'.join([str(it) for it in self.items])
+            sep = '\n'
         else:  # 'text'
             sep = '\n' * 2 + '%' * 50 + '\n' * 3
-            text = sep.join([it.to_txt() for it in self.items])
 
-        with Path(dump_file).open('wt', encoding=enc) as f:
-            f.writelines(text)
+        # Items are written one at a time, so that the whole dump never
+        #  needs to be held in memory
+        with Path(dump_file).open('wt', encoding=enc, buffering=1 << 20) as f:
+            for i, it in enumerate(self.items):
+                if i > 0:
+                    f.write(sep)
+                f.write(str(it) if mode == 'headers' else it.to_txt())
 
     @staticmethod
     def _list_meta_files(data_root: Path):
@@ -166,9 +264,19 @@ class EurLexDataset:
             raise OSError(f'{data_root} does not exist.')
 
         if data_root.is_file():
-            with data_root.open('rt') as f:
-                file_list = [Path(l.strip()) for l in f.readlines()]
+            lines = data_root.read_text().splitlines()
+            file_list = [Path(l.strip()) for l in lines if l.strip()]
         else:  # is a directory
-            file_list = list(data_root.glob('**/*.doc.xml'))
+            # Walk the tree with `os.scandir`, which gets file types from
+            #  directory entries without an additional `stat` for each file
+            file_list = []
+            dirs = [str(data_root)]
+            while dirs:
+                with os.scandir(dirs.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.append(entry.path)
+                        elif entry.name.endswith('.doc.xml'):
+                            file_list.append(Path(entry.path))
 
         return file_list
@@ -6,7 +6,7 @@ from eurlex_ds import EurLexDataset
 
 def main(args: argparse.Namespace):
 
-    dataset = EurLexDataset(data_root=args.data_root)
+    dataset = EurLexDataset(data_root=args.data_root, num_workers=args.num_workers)
     print(f'Number of documents: {len(dataset)}')
 
     # Dump all concatenated docs in human readable text
@@ -20,6 +20,8 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('data_root', type=Path)
     parser.add_argument('--output_dir', type=Path, default='./output')
+    parser.add_argument('--num_workers', type=int, default=None,
+                        help='Number of processes loading the documents (default: number of CPUs)')
     args = parser.parse_args()
 
     if not args.output_dir.is_dir():
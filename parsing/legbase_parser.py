@@ -1,5 +1,6 @@
 from pathlib import Path
-from xml.etree.cElementTree import iterparse
+
+from lxml import etree
 
 
 class LegBaseParser:
@@ -12,21 +13,27 @@ class LegBaseParser:
         """
         return self.extract_legal_bases(file_path)
 
+    @staticmethod
+    def parse_tree(root):
+        """
+        Extract legal bases from the root of an already parsed data file.
+        """
+        return [''.join(elem.itertext()) for elem in root.iter('VISA')]
+
     @staticmethod
     def extract_legal_bases(file_path: Path):
 
         legal_bases = []
 
-        for event, elem in iterparse(file_path, events=('start', 'end')):
-
-            if event == 'start' and elem.tag == 'VISA':
-                cur_base = ''
-                for t in elem.itertext():
-                    cur_base += t
-                legal_bases.append(cur_base)
+        # Only VISA elements are reported, everything else is skipped by lxml
+        for event, elem in etree.iterparse(str(file_path), events=('end',), tag='VISA',
+                                           remove_comments=True, remove_pis=True):
+            legal_bases.append(''.join(elem.itertext()))
 
-            elif event == 'end':
-                elem.clear()
+            # Free memory of VISA elements already processed
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
 
             # todo: we may break the loop before the whole doc is parsed
 
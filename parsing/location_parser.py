@@ -2,6 +2,8 @@ import re
 from collections import defaultdict
 from pathlib import Path
 
+import ahocorasick
+
 
 def read_geo_table(table_file: Path, encoding: str = 'utf-8',
                    sep: str = '\t', comment: str = '#'):
@@ -37,6 +39,22 @@ def read_geo_table(table_file: Path, encoding: str = 'utf-8',
     return geo_dict
 
 
+def _is_word_char(c: str):
+    """
+    Check whether `c` is a word character (i.e. regex `\\w`).
+    """
+    return c.isalnum() or c == '_'
+
+
+def _is_word_boundary(text: str, idx: int):
+    """
+    Check whether there is a word boundary (i.e. regex `\\b`) at `text[idx]`.
+    """
+    before = idx > 0 and _is_word_char(text[idx - 1])
+    after = idx < len(text) and _is_word_char(text[idx])
+    return before != after
+
+
 class GeoRegex:
     """
     The GeoRegex object encapsulates the regular expression needed to find a
@@ -48,8 +66,13 @@ class GeoRegex:
 
         self.pattern = self._preprocess(self.plain_name)
 
-        if whole_word:
-            self.pattern = rf'\b{self.pattern}\b'
+        # Word boundaries are needed only next to word characters: e.g. the
+        #  boundary before a leading space would actually require the
+        #  space to be preceded by a word
+        if whole_word and _is_word_char(self.plain_name[0]):
+            self.pattern = rf'\b{self.pattern}'
+        if whole_word and _is_word_char(self.plain_name[-1]):
+            self.pattern = rf'{self.pattern}\b'
 
         self.flags = re.IGNORECASE if ignore_case else 0
         self.regex: re.Pattern = re.compile(self.pattern, self.flags)
@@ -60,16 +83,18 @@ class GeoRegex:
     @staticmethod
     def _preprocess(name: str):
         # todo: this could be performed a-priori automatically over all keys
+        # Patterns are lower case, so that they can also be matched against
+        #  lower case text without ignoring case (which is slower)
         conversion_dict = {
-            'Balkans': '(?<!Western )Balkans',
-            'Sudan': '(?<!South )Sudan',
-            'Mediterranean': '(?<!Southern )Mediterranean',
-            'Vatican': 'Vatican(?! City)',
-            'Czech': 'Czech(?! Republic)',
-            'Swiss': 'Swiss(?! Confederation)',
-            'Palestinian': 'Palestinian(?! Territor)'
+            'Balkans': '(?<!western )balkans',
+            'Sudan': '(?<!south )sudan',
+            'Mediterranean': '(?<!southern )mediterranean',
+            'Vatican': 'vatican(?! city)',
+            'Czech': 'czech(?! republic)',
+            'Swiss': 'swiss(?! confederation)',
+            'Palestinian': 'palestinian(?! territor)'
         }
-        return conversion_dict.get(name, name)
+        return conversion_dict.get(name, name.lower())
 
 
 class LocationParser:
@@ -100,8 +125,24 @@ class LocationParser:
         #  and they would appear twice (e.g. Luxembourg)
         all_geo_names = list(set(all_geo_names))
 
-        # Compile regexes for faster and more readable reuse
-        self.regexes = [GeoRegex(name) for name in all_geo_names]
+        # Most names are plain literals: these are all searched at once by
+        #  an Aho-Corasick automaton. Different names may only differ in case
+        #  (e.g. `Hong Kong` and `Hong kong`), so each key maps to a list.
+        literals = defaultdict(list)
+        for name in all_geo_names:
+            if GeoRegex._preprocess(name) == name.lower():
+                literals[name.lower()].append(name)
+
+        # Like GeoRegex, word boundaries are checked only next to word characters
+        self.automaton = ahocorasick.Automaton()
+        for key, names in literals.items():
+            self.automaton.add_word(key, (len(key), names, _is_word_char(key[0]), _is_word_char(key[-1])))
+        self.automaton.make_automaton()
+
+        # Compile regexes for the few names which need lookarounds. These
+        #  are matched against lower case text, without ignoring case
+        self.regexes = [GeoRegex(name, ignore_case=False) for name in all_geo_names
+                        if GeoRegex._preprocess(name) != name.lower()]
 
     def __call__(self, text: str):
         """
@@ -109,8 +150,16 @@ class LocationParser:
         """
         # todo: keep track of the index of each match
         locations = defaultdict(int)
+
+        text_lower = text.lower()
+        for end, (length, names, check_start, check_end) in self.automaton.iter(text_lower):
+            if (not check_start or _is_word_boundary(text_lower, end - length + 1)) and \
+                    (not check_end or _is_word_boundary(text_lower, end + 1)):
+                for name in names:
+                    locations[name] += 1
+
         for regex in self.regexes:
-            matches = list(regex.finditer(text))
+            matches = list(regex.finditer(text_lower))
             if matches:
                 locations[regex.plain_name] += len(matches)
         return locations
@@ -18,7 +18,7 @@ class Tokenizer:
         self.filter_stopwords = filter_stopwords
         self.to_lower = to_lower
 
-        self.stopwords = nltk.corpus.stopwords.words('english')
+        self.stopwords = frozenset(nltk.corpus.stopwords.words('english'))
 
     def __call__(self, raw_text: str):
         """
@@ -32,21 +32,11 @@ class Tokenizer:
         if self.to_lower:
             raw_text = raw_text.lower()
         tokens = nltk.word_tokenize(raw_text)
-        tokens[:] = [t for t in tokens if self._is_valid(t)]
-        return tokens
-
-    def _is_valid(self, token: str):
-        """
-        Check whether the token is valid for current Tokenizer.
 
-        Args:
-            token: Current word (token) to be evaluated.
-
-        Returns valid: bool
-        """
-        valid = True
-        if self.check_is_alpha and not token.isalpha():
-            valid = False
-        if self.filter_stopwords and token in self.stopwords:
-            valid = False
-        return valid
+        # Filter using local names only, avoiding attribute lookups per token
+        stopwords = self.stopwords if self.filter_stopwords else frozenset()
+        if self.check_is_alpha:
+            tokens[:] = [t for t in tokens if t.isalpha() and t not in stopwords]
+        else:
+            tokens[:] = [t for t in tokens if t not in stopwords]
+        return tokens